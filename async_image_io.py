@@ -0,0 +1,211 @@
+import asyncio
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import cv2
+import numpy as np
+from PIL import Image
+
+# Number of files read or written concurrently. Reads are dominated by storage latency
+# so this can be much higher than the number of cores.
+IO_CONCURRENCY = 32
+# Number of threads used to decode, process and encode images. OpenCV and Pillow release
+# the GIL while decoding/encoding so threads are enough to keep all cores busy.
+DECODE_WORKERS = os.cpu_count() or 4
+# Maximum number of encoded outputs waiting to be written to storage.
+WRITE_QUEUE_SIZE = 64
+# Interval in seconds at which a worker blocked on a full write queue checks whether processing was aborted.
+SAVE_POLL_INTERVAL = 0.1
+
+
+def read_file_bytes(file_path):
+    """
+    Reads the whole content of a file.
+    :param file_path: Path of the file to read
+    :return: Content of the file as bytes
+    """
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+def write_file_bytes(file_path, data):
+    """
+    Writes bytes to a file, creating the parent directories if they do not exist.
+    :param file_path: Path of the file to write
+    :param data: Bytes to write into the file
+    :return: None
+    """
+    dir_name = os.path.dirname(file_path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    with open(file_path, 'wb') as f:
+        f.write(data)
+
+
+def decode_cv2(data, flags=cv2.IMREAD_COLOR):
+    """
+    Decodes encoded image bytes into an OpenCV image (same result as cv2.imread).
+    :param data: Encoded image bytes
+    :param flags: OpenCV imread flags i.e. cv2.IMREAD_COLOR or cv2.IMREAD_GRAYSCALE
+    :return: Decoded image as numpy array
+    """
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+    if image is None:
+        raise ValueError("Unable to decode image data")
+    return image
+
+
+def decode_cv2_grayscale(data):
+    """
+    Decodes encoded image bytes into a grayscale OpenCV image.
+    :param data: Encoded image bytes
+    :return: Decoded grayscale image as numpy array
+    """
+    return decode_cv2(data, cv2.IMREAD_GRAYSCALE)
+
+
+def decode_pil(data):
+    """
+    Decodes encoded image bytes into a Pillow image (same result as Image.open).
+    :param data: Encoded image bytes
+    :return: Decoded Pillow image
+    """
+    img = Image.open(io.BytesIO(data))
+    # Decode pixels now while we are running in a worker thread.
+    img.load()
+    return img
+
+
+def encode_cv2(image, ext='.jpg', params=None):
+    """
+    Encodes an OpenCV image into bytes (same file content as cv2.imwrite).
+    :param image: Image to encode
+    :param ext: File extension which determines the output format
+    :param params: OpenCV imwrite parameters
+    :return: Encoded image bytes
+    """
+    status, buffer = cv2.imencode(ext, image, params if params is not None else [])
+    if not status:
+        raise ValueError("Unable to encode image as " + ext)
+    return buffer.tobytes()
+
+
+def encode_pil(img, image_format='JPEG', **params):
+    """
+    Encodes a Pillow image into bytes (same file content as Image.save).
+    :param img: Pillow image to encode
+    :param image_format: Output image format
+    :param params: Extra parameters passed to Image.save i.e. quality
+    :return: Encoded image bytes
+    """
+    buffer = io.BytesIO()
+    img.save(buffer, image_format, **params)
+    return buffer.getvalue()
+
+
+async def process_images_async(image_paths, func, decode=decode_cv2, io_concurrency=IO_CONCURRENCY,
+                               decode_workers=DECODE_WORKERS, write_queue_size=WRITE_QUEUE_SIZE,
+                               read_file=read_file_bytes, write_file=write_file_bytes):
+    """
+    Coroutine version of process_images for callers which already run an event loop i.e. an async server.
+    See process_images for the parameters.
+    :return: List of values returned by func, in the same order as image_paths
+    """
+    loop = asyncio.get_running_loop()
+    io_pool = ThreadPoolExecutor(max_workers=io_concurrency)
+    decode_pool = ThreadPoolExecutor(max_workers=decode_workers)
+    # Limits the number of images which are read but not yet processed, so that prefetching
+    # never holds more than io_concurrency images in memory.
+    prefetch = asyncio.Semaphore(io_concurrency)
+    write_queue = asyncio.Queue(maxsize=write_queue_size)
+    write_errors = list()
+    # Set once processing has finished or failed, workers must not wait on the write queue after that
+    closing = threading.Event()
+
+    def save(output_path, data):
+        # Called from decode workers. Blocks the worker while the write queue is full.
+        if closing.is_set():
+            raise RuntimeError("Image processing was aborted")
+        future = asyncio.run_coroutine_threadsafe(write_queue.put((output_path, data)), loop)
+        while True:
+            try:
+                return future.result(SAVE_POLL_INTERVAL)
+            except TimeoutError:
+                if closing.is_set():
+                    future.cancel()
+                    raise RuntimeError("Image processing was aborted")
+
+    def decode_and_process(image_path, data):
+        return func(image_path, decode(data), save)
+
+    async def process(image_path):
+        async with prefetch:
+            data = await loop.run_in_executor(io_pool, read_file, image_path)
+            return await loop.run_in_executor(decode_pool, decode_and_process, image_path, data)
+
+    async def writer():
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                break
+            output_path, data = item
+            try:
+                await loop.run_in_executor(io_pool, write_file, output_path, data)
+            except Exception as e:
+                # Keep draining the queue so that workers waiting on it are not blocked forever.
+                write_errors.append(e)
+
+    writers = [asyncio.ensure_future(writer()) for _ in range(io_concurrency)]
+    tasks = [asyncio.ensure_future(process(image_path)) for image_path in image_paths]
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        closing.set()
+        # Cancel images which are not processed yet when an image failed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for _ in writers:
+            await write_queue.put(None)
+        await asyncio.gather(*writers)
+        # Wait for running workers without blocking the event loop, a worker may still be inside save
+        await loop.run_in_executor(None, decode_pool.shutdown)
+        await loop.run_in_executor(None, io_pool.shutdown)
+    if len(write_errors) > 0:
+        raise write_errors[0]
+    return results
+
+
+def process_images(image_paths, func, decode=decode_cv2, io_concurrency=IO_CONCURRENCY,
+                   decode_workers=DECODE_WORKERS, write_queue_size=WRITE_QUEUE_SIZE,
+                   read_file=read_file_bytes, write_file=write_file_bytes):
+    """
+    Processes images with concurrent reads, decoding in a worker pool and asynchronous writes.
+    Image files are prefetched with many concurrent reads so that storage latency is overlapped,
+    decoded and passed to func in the worker pool, and any output saved by func is written by
+    background writers through a bounded queue.
+    func is called as func(image_path, image, save) where image is the decoded image and
+    save(output_path, data) queues encoded bytes (see encode_cv2 and encode_pil) to be written.
+    :param image_paths: List of image file paths to process
+    :param func: Function to apply on each decoded image. It runs in a worker thread.
+    :param decode: Function which decodes file bytes into an image i.e. decode_cv2 or decode_pil
+    :param io_concurrency: Maximum number of concurrent file reads and writes
+    :param decode_workers: Number of threads used to decode and process images
+    :param write_queue_size: Maximum number of outputs waiting to be written
+    :param read_file: Function which reads the bytes of a file at given path
+    :param write_file: Function which writes bytes to a file at given path
+    When called from a running event loop (i.e. Jupyter) images are processed on a private event loop in a helper
+    thread, await process_images_async instead to share the running loop.
+    :return: List of values returned by func, in the same order as image_paths
+    """
+    coroutine = process_images_async(image_paths, func, decode, io_concurrency, decode_workers, write_queue_size,
+                                      read_file, write_file)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # No event loop is running in this thread
+        return asyncio.run(coroutine)
+    # asyncio.run can not be called from a running event loop and blocking on it here would stall that loop anyway
+    with ThreadPoolExecutor(max_workers=1) as helper:
+        return helper.submit(asyncio.run, coroutine).result()
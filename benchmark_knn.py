@@ -0,0 +1,67 @@
+# Script to benchmark IVF index KNN classifier against scikit-learn KNN classifier on labeled_dataset.csv features.
+import os
+import time
+import numpy as np
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.model_selection import train_test_split
+from knn_index import IVFKNeighborsClassifier
+from utils import load_labeled_dataset
+
+# Leaves Dataset Folder Name
+dataset_folder = 'PreprocessedDatabase'
+# Leaves Dataset File Name
+dataset_filename = 'labeled_dataset.csv'
+# Number of copies of training data, each jittered with small noise, to simulate a large augmented feature set
+REPLICATE = 100
+# Standard deviation of the noise relative to standard deviation of each feature
+JITTER = 0.05
+# Number of neighbors used by both classifiers
+N_NEIGHBORS = 5
+# Values of n_probe to benchmark
+N_PROBES = [1, 2, 4, 8, 16, 32]
+
+# Load float32 feature vectors and corresponding labels from CSV file
+X, Y = load_labeled_dataset(os.path.join(os.getcwd(), dataset_folder, dataset_filename))
+X_train, X_test, Y_train, Y_test = train_test_split(X, Y, train_size=0.75, test_size=0.25, shuffle=True, random_state=0)
+
+# Enlarge training data
+rng = np.random.RandomState(0)
+noise_scale = JITTER * X_train.std(axis=0)
+X_train = np.concatenate([X_train + (rng.normal(size=X_train.shape) * noise_scale).astype(np.float32)
+                          for _ in range(REPLICATE)])
+Y_train = np.tile(Y_train, REPLICATE)
+print("Training vectors : %d\tTest vectors : %d" % (len(X_train), len(X_test)))
+
+
+def benchmark(name, classifier, exact_indices=None):
+    ts = time.time()
+    classifier.fit(X_train, Y_train)
+    fit_time = time.time() - ts
+    ts = time.time()
+    accuracy = classifier.score(X_test, Y_test)
+    predict_time = time.time() - ts
+    # Latency of predicting one leaf at a time, as in predict_leaf.py
+    ts = time.time()
+    for x in X_test:
+        classifier.predict(x.reshape(1, -1))
+    single_time = time.time() - ts
+    s = "%-28s fit : %8.3f s\tpredict : %8.3f ms/query\tsingle : %8.3f ms/query\taccuracy : %.4f" % (
+        name, fit_time, predict_time * 1000 / len(X_test), single_time * 1000 / len(X_test), accuracy)
+    if exact_indices is not None:
+        # Fraction of exact nearest neighbors found by the index
+        _, indices = classifier.kneighbors(X_test)
+        recall = np.mean([len(np.intersect1d(a, b)) / N_NEIGHBORS for a, b in zip(indices, exact_indices)])
+        s += "\trecall : %.4f" % recall
+    print(s)
+
+
+# scikit-learn baseline as used in train_knn_model.ipynb
+benchmark("sklearn KNN", KNeighborsClassifier(n_neighbors=N_NEIGHBORS))
+# Exact neighbors on standardized vectors, obtained by probing all lists
+n_lists = int(np.sqrt(len(X_train)))
+exact = IVFKNeighborsClassifier(n_neighbors=N_NEIGHBORS, n_lists=n_lists, n_probe=n_lists).fit(X_train, Y_train)
+_, exact_indices = exact.kneighbors(X_test)
+for n_probe in N_PROBES + [n_lists]:
+    benchmark("IVF KNN (n_probe=%d/%d)" % (n_probe, n_lists),
+              IVFKNeighborsClassifier(n_neighbors=N_NEIGHBORS, n_lists=n_lists, n_probe=n_probe),
+              exact_indices)
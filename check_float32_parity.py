@@ -0,0 +1,41 @@
+# Script to compare memory use and accuracy of RF, SVM and KNN models trained on float64 and float32 features of labeled_dataset.csv.
+import os
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn import svm
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.model_selection import train_test_split
+from utils import load_labeled_dataset
+
+# Leaves Dataset Folder Name
+dataset_folder = 'PreprocessedDatabase'
+# Leaves Dataset File Name
+dataset_filename = 'labeled_dataset.csv'
+csv_path = os.path.join(os.getcwd(), dataset_folder, dataset_filename)
+
+# Models with the parameters used in training notebooks
+models = {
+    'RF': lambda: RandomForestClassifier(n_estimators=70, random_state=0, max_depth=25),
+    'SVM': lambda: svm.SVC(kernel='poly', degree=8, C=1, decision_function_shape='ovo'),
+    'KNN': lambda: KNeighborsClassifier(n_neighbors=5),
+}
+
+X64, Y = load_labeled_dataset(csv_path, dtype=np.float64)
+X32, _ = load_labeled_dataset(csv_path, dtype=np.float32)
+print("Feature matrix : %d x %d" % X32.shape)
+print("float64 : %d bytes\tfloat32 : %d bytes\tsaved : %.1f%%" % (
+    X64.nbytes, X32.nbytes, 100 * (1 - X32.nbytes / X64.nbytes)))
+print("Max absolute difference of feature values : %g" % np.max(np.abs(X64 - X32)))
+
+# Same split of both matrices
+train_indices, test_indices = train_test_split(np.arange(len(Y)), train_size=0.8, test_size=0.2, shuffle=True, random_state=0)
+for name, create_model in models.items():
+    model64 = create_model().fit(X64[train_indices], Y[train_indices])
+    model32 = create_model().fit(X32[train_indices], Y[train_indices])
+    predictions64 = model64.predict(X64[test_indices])
+    predictions32 = model32.predict(X32[test_indices])
+    print("%-4s accuracy float64 : %.4f\tfloat32 : %.4f\tpredictions agreement : %.4f" % (
+        name,
+        np.mean(predictions64 == Y[test_indices]),
+        np.mean(predictions32 == Y[test_indices]),
+        np.mean(predictions64 == predictions32)))
@@ -1,7 +1,17 @@
+import io
 import os
-from utils import get_file_paths
+from utils import get_file_paths, scan_image_sizes
+from async_image_io import process_images, encode_pil
 from PIL import JpegImagePlugin, Image
 
+# Quality of saved JPEG images (75 is Pillow's default)
+JPEG_QUALITY = 75
+
+
+def open_pil(data):
+    # Only parse the image header, pixels are decoded in crop_image after choosing the draft size.
+    return Image.open(io.BytesIO(data))
+
 
 # Get the path to current working directory
 working_dir = os.getcwd()
@@ -10,14 +20,10 @@ working_dir = os.getcwd()
 # Get all file paths in current working directory
 file_paths = get_file_paths(working_dir, '.jpg')
 
-# Get the dimensions of each image file.
-widths = list()
-heights = list()
-for i in range(0, len(file_paths)):
-    img = Image.open(file_paths[i])
-    w, h = img.size
-    widths.append(w)
-    heights.append(h)
+# Get the dimensions of each image file from JPEG headers (cached in the dataset manifest).
+sizes = scan_image_sizes(working_dir, file_paths)
+widths = [w for w, _ in sizes]
+heights = [h for _, h in sizes]
 
 # Calculate the minimum of each dimension
 min_width = min(widths)
@@ -27,30 +33,44 @@ print("Minimum Height: " + str(min_height))
 
 # Crop each image and save it
 output_dir = 'cropped'
-for i in range(0, len(file_paths)):
-    img = Image.open(file_paths[i])
+
+
+def crop_image(file_path, img, save):
     # Get original width and height of image
     w, h = img.size
     if w == min_width:
-        print("Minimum width image file path : " + file_paths[i])
+        print("Minimum width image file path : " + file_path)
     if h == min_height:
-        print("Minimum height image file path : " + file_paths[i])
+        print("Minimum height image file path : " + file_path)
     # Calculate aspect ratio of image
     aspect_ratio = h / w
     # Calculate new width and height preserving aspect ratio
     c_width = min_width
     c_height = int(min_width * aspect_ratio)
-    # Resize image to new dimensions
-    resized_img = img.resize((c_width, c_height))
     # Calculate corners for cropping resized image
     left = (c_width - min_width) / 2
     top = abs(c_height - min_height) / 2
     right = left + min_width
     bottom = top + min_height
-    cropped_img = resized_img.crop((left, top, right, bottom))
+    # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while keeping at least the resized dimensions
+    img.draft(img.mode, (c_width, c_height))
+    d_width, d_height = img.size
+    if bottom <= c_height:
+        # Resize and crop in a single operation by resizing only the crop box mapped to decoded image
+        x_scale = d_width / c_width
+        y_scale = d_height / c_height
+        cropped_img = img.resize((min_width, min_height), box=(left * x_scale, top * y_scale,
+                                                               right * x_scale, bottom * y_scale))
+    else:
+        # Crop box lies outside of the resized image so it is padded by crop
+        resized_img = img.resize((c_width, c_height))
+        cropped_img = resized_img.crop((left, top, right, bottom))
     # Save cropped image
-    file_dir = os.path.dirname(file_paths[i])
-    file_name = os.path.basename(file_paths[i])
+    file_dir = os.path.dirname(file_path)
+    file_name = os.path.basename(file_path)
     output_path = os.path.join(file_dir, output_dir)
-    os.makedirs(output_path, exist_ok=True)
-    cropped_img.save(os.path.join(output_path, file_name), 'JPEG')
+    save(os.path.join(output_path, file_name), encode_pil(cropped_img, 'JPEG', quality=JPEG_QUALITY))
+
+
+# Images are decoded, resized, cropped and encoded in parallel by the worker pool
+process_images(file_paths, crop_image, decode=open_pil)
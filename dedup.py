@@ -0,0 +1,227 @@
+import warnings
+import numpy as np
+import cv2
+from sklearn.model_selection import GroupShuffleSplit, train_test_split
+
+# Width and height of the hash grid. Hashes are HASH_SIZE * HASH_SIZE = 64 bits long.
+HASH_SIZE = 8
+# Images are near duplicates when their pHashes differ by at most PHASH_DISTANCE bits and their dHashes by at
+# most DHASH_DISTANCE bits. pHash is the primary key as it is robust to the contrast, brightness, sharpness and
+# color enhancement of expand_dataset.py, dHash filters out distinct leaves whose DCT happens to match.
+# Check these thresholds on the dataset with tune_duplicate_thresholds.py.
+PHASH_DISTANCE = 4
+DHASH_DISTANCE = 10
+# Maximum number of images in a group, i.e. an original image with its augmented versions
+MAX_GROUP_SIZE = 8
+# Downscaled size used by pHash before applying DCT
+PHASH_IMAGE_SIZE = 32
+
+
+def _downscale(images, size):
+    """
+    Converts images to grayscale and downscales them to the same size.
+    :param images: List of BGR or grayscale images
+    :param size: Tuple (width, height) of the downscaled images
+    :return: Numpy array of shape N x height x width holding downscaled grayscale images
+    """
+    small_images = list()
+    for image in images:
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        small_images.append(cv2.resize(image, size, interpolation=cv2.INTER_AREA))
+    return np.stack(small_images).astype(np.float32)
+
+
+def _pack_bits(bits):
+    """
+    Packs rows of 64 boolean values into 64 bit integers.
+    :param bits: Boolean numpy array of shape N x 64
+    :return: Numpy array of N uint64 hashes
+    """
+    return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
+
+
+def hash_thumbnails(image, hash_size=HASH_SIZE, image_size=PHASH_IMAGE_SIZE):
+    """
+    Downscales an image to the grayscale thumbnails hashed by phash and dhash. Hashing a batch of thumbnails
+    gives the same hashes as hashing the images, so a batch can be hashed without keeping the images in memory.
+    :param image: BGR or grayscale image
+    :param hash_size: Width and height of the hash grid
+    :param image_size: Size to which images are downscaled by phash
+    :return: Tuple (phash thumbnail, dhash thumbnail)
+    """
+    return _downscale([image], (image_size, image_size))[0], _downscale([image], (hash_size + 1, hash_size))[0]
+
+
+def dhash(images, hash_size=HASH_SIZE):
+    """
+    Computes difference hashes of images. Each bit tells whether a pixel of the downscaled
+    grayscale image is brighter than its left neighbour. All images are hashed at once.
+    :param images: List of BGR or grayscale images
+    :param hash_size: Width and height of the hash grid
+    :return: Numpy array of uint64 hashes, one for each image
+    """
+    small_images = _downscale(images, (hash_size + 1, hash_size))
+    bits = small_images[:, :, 1:] > small_images[:, :, :-1]
+    return _pack_bits(bits.reshape(len(small_images), -1))
+
+
+def _dct_matrix(n):
+    """
+    Creates the orthonormal DCT-II matrix of size n x n.
+    :param n: Size of the matrix
+    :return: Numpy array holding DCT-II matrix
+    """
+    k = np.arange(n).reshape(-1, 1)
+    i = np.arange(n).reshape(1, -1)
+    matrix = np.sqrt(2 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+def phash(images, hash_size=HASH_SIZE, image_size=PHASH_IMAGE_SIZE):
+    """
+    Computes perceptual hashes of images. Each bit tells whether a low frequency DCT coefficient
+    of the downscaled grayscale image is above the median coefficient. All images are hashed at once.
+    :param images: List of BGR or grayscale images
+    :param hash_size: Width and height of the hash grid
+    :param image_size: Size to which images are downscaled before applying DCT
+    :return: Numpy array of uint64 hashes, one for each image
+    """
+    small_images = _downscale(images, (image_size, image_size))
+    dct_matrix = _dct_matrix(image_size)
+    # 2D DCT of all images using batched matrix multiplication
+    dct = dct_matrix @ small_images @ dct_matrix.T
+    low_frequencies = dct[:, :hash_size, :hash_size].reshape(len(small_images), -1)
+    medians = np.median(low_frequencies, axis=1, keepdims=True)
+    return _pack_bits(low_frequencies > medians)
+
+
+def hamming_distance(hash1, hash2):
+    """
+    Counts the number of bits which differ between two hashes.
+    :param hash1: First hash
+    :param hash2: Second hash
+    :return: Hamming distance between hashes
+    """
+    return bin(int(hash1) ^ int(hash2)).count('1')
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over hashes for finding all hashes within a Hamming distance of a query
+    without comparing it against every hash in the index.
+    """
+
+    def __init__(self):
+        # Each node is a list [hash, item, children] where children maps distance to child node
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, hash_value, item):
+        """
+        Adds a hash to the tree.
+        :param hash_value: Hash to add
+        :param item: Value returned by search for this hash i.e. image path
+        :return: None
+        """
+        hash_value = int(hash_value)
+        new_node = [hash_value, item, dict()]
+        self.size += 1
+        if self.root is None:
+            self.root = new_node
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = new_node
+                return
+            node = child
+
+    def search(self, hash_value, max_distance):
+        """
+        Finds all hashes in the tree within a maximum Hamming distance of given hash.
+        :param hash_value: Hash to search for
+        :param max_distance: Maximum Hamming distance of matched hashes
+        :return: List of (distance, item) tuples of matched hashes sorted by distance
+        """
+        hash_value = int(hash_value)
+        matches = list()
+        nodes = [self.root] if self.root is not None else []
+        while len(nodes) != 0:
+            node = nodes.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                matches.append((distance, node[1]))
+            # By triangle inequality only children at distance in this range can match
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    nodes.append(child)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+def group_near_duplicates(phashes, dhashes, labels, phash_distance=PHASH_DISTANCE, dhash_distance=DHASH_DISTANCE,
+                          max_group_size=MAX_GROUP_SIZE):
+    """
+    Assigns a group to each image such that near duplicates of the same label share a group.
+    Images are clustered around exemplars: an image joins the group of the nearest exemplar of its label within
+    the thresholds, otherwise it becomes the exemplar of a new group. Near duplicates are never chained through
+    other images, so groups stay small even when many distinct leaves hash close to each other.
+    :param phashes: List of pHashes of images
+    :param dhashes: List of dHashes of images
+    :param labels: List of labels of images
+    :param phash_distance: Maximum pHash Hamming distance between an image and its exemplar
+    :param dhash_distance: Maximum dHash Hamming distance between an image and its exemplar
+    :param max_group_size: Maximum number of images in a group
+    :return: Numpy array of group ids, one for each image
+    """
+    groups = np.zeros(len(phashes), dtype=np.int64)
+    group_sizes = list()
+    # Tree of exemplar pHashes of each label, items are indices of exemplar images
+    exemplar_trees = dict()
+    for i in range(len(phashes)):
+        tree = exemplar_trees.setdefault(labels[i], BKTree())
+        group = None
+        for _, j in tree.search(phashes[i], phash_distance):
+            if hamming_distance(dhashes[i], dhashes[j]) <= dhash_distance and group_sizes[groups[j]] < max_group_size:
+                group = groups[j]
+                break
+        if group is None:
+            group = len(group_sizes)
+            group_sizes.append(0)
+            tree.add(phashes[i], i)
+        groups[i] = group
+        group_sizes[group] += 1
+    return groups
+
+
+def grouped_train_test_split(X, Y, groups, train_size=None, test_size=None, random_state=None, shuffle=True):
+    """
+    Splits data into train and test data such that all samples of a group are in the same split,
+    so near duplicate images never leak from training data into test data.
+    If groups is None then samples are split with sklearn's train_test_split.
+    :param X: Feature vectors
+    :param Y: Labels of feature vectors
+    :param groups: Group of each sample, see group_near_duplicates. Samples are split without groups
+                   when there are less than 2 groups.
+    :param train_size: Proportion of groups to include in train split
+    :param test_size: Proportion of groups to include in test split
+    :param random_state: Seed used to shuffle groups
+    :param shuffle: Whether to shuffle samples when splitting without groups, groups are always shuffled
+    :return: Tuple (X_train, X_test, Y_train, Y_test)
+    """
+    if groups is not None and len(np.unique(groups)) < 2:
+        warnings.warn("Less than 2 groups of samples, splitting without groups")
+        groups = None
+    if groups is None:
+        return train_test_split(X, Y, train_size=train_size, test_size=test_size, shuffle=shuffle,
+                                random_state=random_state)
+    splitter = GroupShuffleSplit(n_splits=1, train_size=train_size, test_size=test_size, random_state=random_state)
+    train_indices, test_indices = next(splitter.split(X, Y, groups))
+    return X[train_indices], X[test_indices], Y[train_indices], Y[test_indices]
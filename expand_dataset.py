@@ -1,10 +1,11 @@
 ## Python Script to expand dataset by enhancing existing images in dataset.
 
 import os
-import string
-import random
+import hashlib
+import threading
 from PIL import Image, ImageEnhance
-from utils import get_file_paths
+from utils import get_file_paths, load_manifest, save_manifest, get_manifest_entry
+from async_image_io import process_images, decode_pil, encode_pil
 
 # Image Enhancemnet Parameters
 CONTRAST = 1.5 # 0 : No Contrast Gray Image and 1 : Original Image
@@ -27,46 +28,85 @@ directories = [
 ]
 # Output path
 output_path = os.path.join(dataset_path, 'output')
+
+
+def read_digest(data):
+    # Digest of source file bytes identifies images which are already expanded, pixels are decoded only when needed
+    return hashlib.sha1(data).hexdigest(), data
+
+
+def enhance_image(image_file, source, save):
+    digest, data = source
+    # Skip source image if it was expanded by a previous run or is an exact duplicate of another source image
+    with expanded_digests_lock:
+        if digest in expanded_digests:
+            print("Skipping already expanded image : " + image_file)
+            return None
+        expanded_digests.add(digest)
+    img = decode_pil(data)
+    dir_name = image_dirs[image_file]
+    contrast = ImageEnhance.Contrast(img)
+    contrasted_image = contrast.enhance(CONTRAST)
+    brightness = ImageEnhance.Brightness(contrasted_image)
+    bright_contrasted_img = brightness.enhance(BRIGHTNESS)
+    sharpness = ImageEnhance.Sharpness(bright_contrasted_img)
+    sharp_bright_contrasted_img = sharpness.enhance(SHARPNESS)
+    color = ImageEnhance.Color(sharp_bright_contrasted_img)
+    colored_sharp_bright_contrasted_img = color.enhance(COLOR)
+    img_file_name = os.path.basename(image_file)
+    # Stem is the path of the source within its variety directory, so sources with same file name in different
+    # subdirectories get different output names i.e. t1/0_front.jpg gives t1_0_front
+    stem, ext = os.path.splitext(os.path.relpath(image_file, os.path.join(dataset_path, dir_name)))
+    stem = stem.replace(os.sep, '_')
+    filename = dir_name + '_'
+    # Output Path
+    out_file_path = os.path.join(output_path, dir_name)
+    if 'front' in img_file_name:
+        out_file_path = os.path.join(out_file_path, 'front')
+        filename += 'front_'
+    elif 'back' in img_file_name:
+        out_file_path = os.path.join(out_file_path, 'back')
+        filename += 'back_'
+    # Output names keep the source file name so front and back images of a leaf can be paired by leaf_pairs.py
+    # Original Image file name for output
+    o_filename = filename + stem + '_original'
+    o_out_file_name = o_filename + ext
+    # Enhanced Image file name for output
+    en_filename = filename + stem
+    en_out_file_name = en_filename + ext
+    # Save Enhanced Image (output directories are created by the writer)
+    out_files = [os.path.join(out_file_path, en_out_file_name)]
+    save(out_files[0], encode_pil(colored_sharp_bright_contrasted_img, img.format))
+    if OUT_BOTH:
+        # Save Original Image
+        out_files.append(os.path.join(out_file_path, o_out_file_name))
+        save(out_files[1], encode_pil(img, img.format))
+    return digest, out_files
+
+
+# Digests of source images recorded in output manifest by previous runs, for output files which still exist
+output_manifest = load_manifest(output_path)
+expanded_digests = set(entry['source_sha1'] for key, entry in output_manifest.items()
+                       if 'source_sha1' in entry and os.path.exists(os.path.join(output_path, key)))
+expanded_digests_lock = threading.Lock()
 print("Processing Images ...")
-# Start processing images
+# Map each jpg image file within directories to the name of its directory
+image_dirs = dict()
 for dir in directories:
     dir_name = os.path.basename(dir)
-    # Get all jpg image files within directory
-    image_files = get_file_paths(dir, extension=['.jpg'], recursive=True)
-    for image_file in image_files:
-        img = Image.open(image_file)
-        contrast = ImageEnhance.Contrast(img)
-        contrasted_image = contrast.enhance(CONTRAST)
-        brightness = ImageEnhance.Brightness(contrasted_image)
-        bright_contrasted_img = brightness.enhance(BRIGHTNESS)
-        sharpness = ImageEnhance.Sharpness(bright_contrasted_img)
-        sharp_bright_contrasted_img = sharpness.enhance(SHARPNESS)
-        color = ImageEnhance.Color(sharp_bright_contrasted_img)
-        colored_sharp_bright_contrasted_img = color.enhance(COLOR)
-        img_file_name = os.path.basename(image_file)
-        _ , ext = img_file_name.split('.')
-        filename = dir_name
-        # Output Path
-        out_file_path = os.path.join(output_path, dir_name)
-        if 'front' in img_file_name:
-            out_file_path = os.path.join(out_file_path, 'front')
-            filename += '_front_'
-        elif 'back' in img_file_name:
-            out_file_path = os.path.join(out_file_path, 'back')
-            filename += '_back_'
-        # Make output path in filesystem
-        if not os.path.exists(out_file_path):
-            os.makedirs(out_file_path, exist_ok=True)
-        # Original Image file name for output
-        o_filename = filename + ''.join(random.choices(string.ascii_lowercase + string.digits, k=24))
-        o_out_file_name = o_filename + "." + ext
-        # Enhanced Image file name for output
-        en_filename = filename + ''.join(random.choices(string.ascii_lowercase + string.digits, k=24))
-        en_out_file_name = en_filename + "." + ext
-        # Save Enhanced Image
-        colored_sharp_bright_contrasted_img.save(os.path.join(out_file_path, en_out_file_name))
-        if OUT_BOTH:
-            # Save Original Image
-            img.save(os.path.join(out_file_path, o_out_file_name))
-
+    for image_file in get_file_paths(dir, extension=['.jpg'], recursive=True):
+        image_dirs[image_file] = dir_name
+# Start processing images
+image_files = list(image_dirs.keys())
+results = process_images(image_files, enhance_image, decode=read_digest)
+# Record source of each output image in output manifest so that a run again skips expanded images
+for image_file, result in zip(image_files, results):
+    if result is None:
+        continue
+    digest, out_files = result
+    for out_file in out_files:
+        entry = get_manifest_entry(output_path, output_manifest, out_file)
+        entry['source'] = os.path.relpath(image_file, dataset_path).replace(os.sep, '/')
+        entry['source_sha1'] = digest
+save_manifest(output_path, output_manifest)
 print("Completed! Successfully enhanced dataset.")
\ No newline at end of file
@@ -4,7 +4,7 @@ import cv2
 from sklearn.decomposition import PCA
 from sklearn.preprocessing import MinMaxScaler
 
-def extract_haar_features(image_path, level=5, decompositions=['LL']):
+def extract_haar_features(image_path, level=5, decompositions=['LL'], image=None):
     """
     This function extracts the haar features from an image at a given path and return those features as a tuple.
     
@@ -13,11 +13,13 @@ def extract_haar_features(image_path, level=5, decompositions=['LL']):
      level (optional) - level up to which decomposition using haar wavelet must be performed.
      decompositions (optional) - decompositions to use at each level for generation of feature vectors. No of features = len(decompositions) * level. 
                                  This must me a list of any of the values 'LL', 'LH', 'HL' and 'HH'.
+     image (optional) - already decoded grayscale image of the leaf. If None then image is read from image_path.
     returns:
      tuple object containing extracted features of the leaf.
     """
     # Read image from image file into grayscale mode. 
-    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
     if level <= 0 or level > 6:
         raise Exception("arg `level` must be >= 1 and <= 6")
     if decompositions is not None and type(decompositions) == list and len(decompositions) > 0:
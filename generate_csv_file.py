@@ -5,6 +5,7 @@ import numpy as np
 import os
 import utils
 from features import extract_haar_features
+from async_image_io import process_images, decode_cv2_grayscale
 
 # Prepare dataset directories and image files paths
 # Leaves Dataset Folder Name
@@ -41,8 +42,12 @@ data = pd.DataFrame(columns=cols)
 row_list = list()
 # Extract image features of each image of each variety
 for label, path_list in image_dict.items():
-    for image_path in path_list:
-        features = extract_haar_features(image_path, level=LEVEL, decompositions=DECOMPOSITIONS)
+    # Images are read concurrently and features are extracted in a worker pool
+    features_list = process_images(
+        path_list,
+        lambda image_path, image, save: extract_haar_features(image_path, level=LEVEL, decompositions=DECOMPOSITIONS, image=image),
+        decode=decode_cv2_grayscale)
+    for features in features_list:
         data_row = np.concatenate((features, [label]), axis=0)
         row_dict = dict()
         for i in range(len(cols)):
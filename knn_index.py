@@ -0,0 +1,198 @@
+import numpy as np
+
+# Number of training vectors assigned to centroids at a time while building the index, bounds the
+# memory of the distance matrix to CHUNK_SIZE x n_lists
+CHUNK_SIZE = 16384
+
+
+def _squared_distances(X, Y, Y_squared_norms=None):
+    """
+    Computes squared euclidean distances between all rows of two matrices.
+    :param X: Matrix of shape N x D
+    :param Y: Matrix of shape M x D
+    :param Y_squared_norms: Precomputed squared norms of rows of Y, computed if None
+    :return: Matrix of shape N x M holding squared distances
+    """
+    if Y_squared_norms is None:
+        Y_squared_norms = np.sum(Y * Y, axis=1)
+    distances = np.sum(X * X, axis=1).reshape(-1, 1) - 2 * (X @ Y.T) + Y_squared_norms.reshape(1, -1)
+    # Rounding errors can make distance of identical rows slightly negative
+    return np.maximum(distances, 0)
+
+
+def _assign(X, centroids):
+    """
+    Assigns each vector to its nearest centroid, CHUNK_SIZE vectors at a time.
+    :param X: Matrix of shape N x D
+    :param centroids: Matrix of shape L x D
+    :return: Array of N indices of nearest centroids
+    """
+    centroid_squared_norms = np.sum(centroids * centroids, axis=1)
+    assignments = np.empty(len(X), dtype=np.int64)
+    for start in range(0, len(X), CHUNK_SIZE):
+        chunk = X[start:start + CHUNK_SIZE]
+        # Squared norm of the vector is same for all centroids so it does not change the nearest centroid
+        distances = centroid_squared_norms.reshape(1, -1) - 2 * (chunk @ centroids.T)
+        assignments[start:start + CHUNK_SIZE] = np.argmin(distances, axis=1)
+    return assignments
+
+
+class IVFKNeighborsClassifier:
+    """
+    K nearest neighbors classifier backed by an inverted file (IVF) index over standardized feature vectors.
+    Training vectors are clustered with k-means into n_lists lists. A query is only compared against the
+    vectors of the n_probe lists whose centroids are nearest to it, so prediction time grows with
+    n_probe / n_lists of the training data instead of all of it. Increasing n_probe trades latency for recall
+    and n_probe = n_lists gives exact nearest neighbors.
+    Follows the scikit-learn classifier interface (fit, predict, predict_proba, score) and can be
+    serialized with joblib.
+    """
+
+    def __init__(self, n_neighbors=5, n_lists=None, n_probe=8, n_iter=10, random_state=0):
+        """
+        :param n_neighbors: Number of neighbors used to vote for the label
+        :param n_lists: Number of k-means lists in the index, square root of no of training vectors if None
+        :param n_probe: Number of nearest lists searched for each query
+        :param n_iter: Number of k-means iterations used to build the index
+        :param random_state: Seed used to initialize k-means centroids
+        """
+        self.n_neighbors = n_neighbors
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.random_state = random_state
+
+    def fit(self, X, Y):
+        """
+        Standardizes training vectors and builds the index.
+        :param X: Training feature vectors of shape N x D
+        :param Y: Labels of training feature vectors
+        :return: self
+        """
+        X = np.asarray(X, dtype=np.float32)
+        self.classes_, Y = np.unique(Y, return_inverse=True)
+        # Standardize features so that each feature contributes equally to distances
+        self.mean_ = X.mean(axis=0)
+        self.scale_ = X.std(axis=0)
+        self.scale_[self.scale_ == 0] = 1
+        X = (X - self.mean_) / self.scale_
+        n_lists = self.n_lists if self.n_lists is not None else int(np.sqrt(len(X)))
+        n_lists = max(1, min(n_lists, len(X)))
+        # Cluster training vectors using k-means
+        rng = np.random.RandomState(self.random_state)
+        centroids = X[rng.choice(len(X), n_lists, replace=False)]
+        for _ in range(self.n_iter):
+            assignments = _assign(X, centroids)
+            counts = np.bincount(assignments, minlength=n_lists)
+            sums = np.stack([np.bincount(assignments, weights=X[:, d], minlength=n_lists)
+                             for d in range(X.shape[1])], axis=1)
+            # Keep previous centroid of lists which lost all their vectors
+            non_empty = counts > 0
+            centroids[non_empty] = sums[non_empty] / counts[non_empty].reshape(-1, 1)
+        assignments = _assign(X, centroids)
+        # Store vectors of each list contiguously so a list is a slice list_offsets_[i]:list_offsets_[i+1]
+        order = np.argsort(assignments, kind='stable')
+        self.centroids_ = centroids
+        # Row of training data of each vector in index order, maps search results back to rows of X
+        self.order_ = order
+        self.vectors_ = X[order]
+        self.squared_norms_ = np.sum(self.vectors_ * self.vectors_, axis=1)
+        # Class index of each row of training data, in the order passed to fit like indices returned by kneighbors
+        self.labels_ = Y
+        self.list_offsets_ = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=n_lists))))
+        return self
+
+    def kneighbors(self, X, n_neighbors=None):
+        """
+        Finds approximate nearest training vectors of query vectors.
+        :param X: Query feature vectors of shape Q x D
+        :param n_neighbors: Number of neighbors to find, defaults to n_neighbors of classifier
+        :return: Tuple (distances, indices) of shape Q x n_neighbors where indices refer to rows of
+                 the training data passed to fit. Missing neighbors have distance inf and index -1.
+        """
+        n_neighbors = n_neighbors if n_neighbors is not None else self.n_neighbors
+        X = (np.asarray(X, dtype=np.float32) - self.mean_) / self.scale_
+        n_probe = min(self.n_probe, len(self.centroids_))
+        # Nearest lists of all queries at once
+        centroid_distances = _squared_distances(X, self.centroids_)
+        probes = np.argpartition(centroid_distances, n_probe - 1, axis=1)[:, :n_probe]
+        if len(X) == 1:
+            # Single query: compare it against the vectors of all probed lists in one product
+            candidates = np.concatenate([np.arange(self.list_offsets_[l], self.list_offsets_[l + 1])
+                                         for l in probes[0]])
+            distances = np.full((1, n_neighbors), np.inf, dtype=np.float32)
+            indices = np.full((1, n_neighbors), -1, dtype=np.int64)
+            if len(candidates) != 0:
+                candidate_distances = _squared_distances(X, self.vectors_[candidates], self.squared_norms_[candidates])
+                nearest = np.arange(len(candidates))
+                if len(candidates) > n_neighbors:
+                    nearest = np.argpartition(candidate_distances[0], n_neighbors - 1)[:n_neighbors]
+                distances[0, :len(nearest)] = candidate_distances[0, nearest]
+                indices[0, :len(nearest)] = candidates[nearest]
+        else:
+            distances, indices = self._search_lists(X, probes, n_neighbors)
+        # Sort neighbors of each query by distance
+        order = np.argsort(distances, axis=1)
+        distances = np.sqrt(np.take_along_axis(distances, order, axis=1))
+        indices = np.take_along_axis(indices, order, axis=1)
+        return distances, np.where(indices >= 0, self.order_[np.maximum(indices, 0)], -1)
+
+    def _search_lists(self, X, probes, n_neighbors):
+        """
+        Finds nearest vectors of many queries by searching list by list, so that all queries probing a list are
+        compared against it in one matrix product. Only lists probed by some query are visited.
+        :param X: Standardized query vectors of shape Q x D
+        :param probes: Indices of lists probed by each query, of shape Q x n_probe
+        :param n_neighbors: Number of neighbors to find
+        :return: Tuple (squared distances, indices) of shape Q x n_neighbors, not sorted by distance
+        """
+        distances = np.full((len(X), n_neighbors), np.inf, dtype=np.float32)
+        indices = np.full((len(X), n_neighbors), -1, dtype=np.int64)
+        # Group (query, list) pairs by list
+        flat_probes = probes.ravel()
+        order = np.argsort(flat_probes, kind='stable')
+        probed_lists, starts = np.unique(flat_probes[order], return_index=True)
+        query_groups = np.split(order // probes.shape[1], starts[1:])
+        for l, queries in zip(probed_lists, query_groups):
+            start, end = self.list_offsets_[l], self.list_offsets_[l + 1]
+            if start == end:
+                continue
+            list_distances = _squared_distances(X[queries], self.vectors_[start:end], self.squared_norms_[start:end])
+            list_indices = np.broadcast_to(np.arange(start, end), list_distances.shape)
+            # Merge neighbors found in this list with neighbors found so far and keep the nearest
+            merged_distances = np.concatenate((distances[queries], list_distances), axis=1)
+            merged_indices = np.concatenate((indices[queries], list_indices), axis=1)
+            nearest = np.argpartition(merged_distances, n_neighbors - 1, axis=1)[:, :n_neighbors]
+            distances[queries] = np.take_along_axis(merged_distances, nearest, axis=1)
+            indices[queries] = np.take_along_axis(merged_indices, nearest, axis=1)
+        return distances, indices
+
+    def predict_proba(self, X):
+        """
+        Estimates class probabilities as the fraction of nearest neighbors belonging to each class.
+        :param X: Query feature vectors of shape Q x D
+        :return: Matrix of shape Q x no of classes, columns ordered as classes_
+        """
+        _, indices = self.kneighbors(X)
+        found = indices >= 0
+        labels = np.where(found, self.labels_[np.maximum(indices, 0)], len(self.classes_))
+        votes = np.zeros((len(indices), len(self.classes_) + 1))
+        np.add.at(votes, (np.arange(len(indices)).reshape(-1, 1), labels), 1)
+        return votes[:, :-1] / np.maximum(found.sum(axis=1), 1).reshape(-1, 1)
+
+    def predict(self, X):
+        """
+        Predicts labels of query vectors by majority vote of their nearest neighbors.
+        :param X: Query feature vectors of shape Q x D
+        :return: Array of predicted labels
+        """
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def score(self, X, Y):
+        """
+        Computes accuracy of predictions.
+        :param X: Query feature vectors of shape Q x D
+        :param Y: True labels of query vectors
+        :return: Fraction of correctly predicted labels
+        """
+        return np.mean(self.predict(X) == np.asarray(Y))
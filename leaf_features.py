@@ -0,0 +1,127 @@
+import numpy as np
+import cv2
+from collections import namedtuple
+
+# Names of the feature columns in the order of vectors returned by features_to_vector
+FEATURE_COLUMNS = ['aspectratio', 'area', 'perimeter', 'formfactor', 'meanR', 'meanG', 'meanB', 'veinarea1', 'veinarea2', 'elongation']
+
+
+def extract_features(image_path, image=None):
+    """
+    This function extracts the following features from an image at a given path and return those features as
+    a namedtuple object.
+    Features :-
+    1. Aspect Ratio
+    2. Leaf Area
+    3. Leaf Margin Perimeter
+    4. Form Factor
+    5. Mean Color
+    6. Vein Area Ratio
+    7. Elongation
+    
+    These features can be accessed in the returned namedtuple object by using following attributes on that object :-
+    1. aspectratio - Aspect Ratio of Leaf
+    2. area - Leaf Area to bounding rectangle area ratio
+    3. perimeter - Leaf Perimeter to bounding rectangle perimeter ratio
+    4. formfactor - Form Factor
+    5. meancolor - Mean Color
+    6. veinarea - Ratio of vein area to leaf area
+    7. elongation - Measuring the length of the object
+    
+    arguments:
+     image_path - string containing path to leaf image file.
+     image (optional) - already decoded BGR image of the leaf. If None then image is read from image_path.
+    returns:
+     namedtuple object containing extracted features of the leaf as float32 values.
+    """
+    # Read image from image file
+    bgr_image = cv2.imread(image_path) if image is None else image
+    # Obtain RGB and Grayscale images
+    rgb_image = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB)
+    # Apply binary otsu thresholdng to grayscale image
+    gray_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2GRAY)
+    ostu_value, thresh_image = cv2.threshold(gray_image,0, 255,cv2.THRESH_BINARY+cv2.THRESH_OTSU)
+    # Find all contours in thresholded image using RETR_EXTERNAL method
+    image_contours, _ = cv2.findContours(thresh_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # Find leaf contour among all contours
+    leaf_contour = max(image_contours, key=cv2.contourArea) # Contour having maximum area is our leaf contour
+    
+    # FEATURE - Aspect Ratio
+    x, y, w, h = cv2.boundingRect(leaf_contour)
+    aspectratio = h / w
+    
+    # FEATURE - Area
+    area = cv2.contourArea(leaf_contour)
+    area_ratio = area / (w * h)
+    
+    # FEATURE - Perimeter
+    perimeter = cv2.arcLength(leaf_contour, True)
+    perimeter_ratio = perimeter / (2 * (w + h))
+    
+    # FEATURE - Form Factor
+    formfactor = (4 * np.pi * area) / perimeter ** 2
+    
+    # FEATURE - Mean Color
+    # Crop rgb image using bounding rectangle of leaf contour to get leaf portion
+    leaf_portion = rgb_image[y:y+h, x:x+w]
+    r_mean = np.mean(leaf_portion[: ,: ,0]) / 255
+    g_mean = np.mean(leaf_portion[: ,: ,1]) / 255
+    b_mean = np.mean(leaf_portion[: ,: ,2]) / 255
+    meancolor = (r_mean, g_mean, b_mean)
+    
+    # FEATURE - Vein Area Ratio
+    # Apply sobel filter to image for vein detection
+    leaf_portion = cv2.cvtColor(leaf_portion, cv2.COLOR_RGB2GRAY)
+    # 16 bit signed output holds every 3x3 sobel response exactly, wrapping it to uint8 gives the same
+    # image as the previous CV_64F computation at a quarter of the memory
+    sobel_img = cv2.Sobel(leaf_portion,cv2.CV_16S,1,1,ksize=3)
+    sobel_img = sobel_img.astype(np.uint8)
+    # Apply Morphological erosion on sobel image
+    kernel2 = np.ones((2,1), np.uint8)
+    kernel4 = np.ones((4,1), np.uint8)
+    erosion2 = cv2.morphologyEx(sobel_img, cv2.MORPH_ERODE, kernel2)
+    erosion4 = cv2.morphologyEx(sobel_img, cv2.MORPH_ERODE, kernel4)
+    # Calculate ratio of no of non-black pixels to total no of leaf pixels
+    vein_area_ratio_1 = cv2.countNonZero(erosion2) / area
+    vein_area_ratio_2 = cv2.countNonZero(erosion4) / area
+
+    # FEATURE - Elongation
+    minor_axis = min(w,h)
+    major_axis = max(w,h)
+    elongation = 1 - (minor_axis / major_axis)
+
+    # Create and return namedtuple containing extracted features as float32 values
+    Feature = namedtuple('Feature', ['aspectratio', 'area', 'perimeter', 'formfactor', 'meancolor', 'veinarea1', 'veinarea2', 'elongation'])
+    leaf_feature = Feature(
+        aspectratio=np.float32(aspectratio),
+        area=np.float32(area_ratio),
+        perimeter=np.float32(perimeter_ratio),
+        formfactor=np.float32(formfactor),
+        meancolor=tuple(np.float32(mean) for mean in meancolor),
+        veinarea1=np.float32(vein_area_ratio_1),
+        veinarea2=np.float32(vein_area_ratio_2),
+        elongation=np.float32(elongation))
+    return leaf_feature
+
+
+def features_to_vector(features):
+    """
+    Flattens a namedtuple returned by extract_features into a vector of feature values ordered as FEATURE_COLUMNS.
+
+    arguments:
+     features - namedtuple object returned by extract_features.
+    returns:
+     float32 numpy array of feature values.
+    """
+    return np.array([
+        features.aspectratio,
+        features.area,
+        features.perimeter,
+        features.formfactor,
+        features.meancolor[0],
+        features.meancolor[1],
+        features.meancolor[2],
+        features.veinarea1,
+        features.veinarea2,
+        features.elongation,
+    ], dtype=np.float32)
@@ -0,0 +1,117 @@
+import os
+import numpy as np
+from async_image_io import process_images
+from leaf_features import FEATURE_COLUMNS, extract_features, features_to_vector
+
+# Names of the columns of paired feature vectors. Front image features are followed by back image features.
+PAIR_FEATURE_COLUMNS = ['front_' + col for col in FEATURE_COLUMNS] + ['back_' + col for col in FEATURE_COLUMNS]
+# Sides of a leaf as named in image file names
+SIDES = ('front', 'back')
+# Paired feature vectors are classified by a model trained on PAIR_FEATURE_COLUMNS
+MODE_CONCAT = 'concat'
+# Front and back feature vectors are classified by a model trained on FEATURE_COLUMNS and probabilities are averaged
+MODE_ENSEMBLE = 'ensemble'
+
+
+def _pair_key(image_path):
+    """
+    This function gets the side of a leaf image and the key which is same for the front and back images of a leaf.
+
+    arguments:
+     image_path - string containing path to leaf image file.
+    returns:
+     tuple (side, key) where side is 'front' or 'back', or (None, None) if file name does not name exactly one side.
+    """
+    dir_name, file_name = os.path.split(image_path)
+    sides = [side for side in SIDES if side in file_name]
+    if len(sides) != 1:
+        return None, None
+    # Front and back images may also be kept in sibling directories named front and back
+    if os.path.basename(dir_name) in SIDES:
+        dir_name = os.path.dirname(dir_name)
+    return sides[0], (dir_name, file_name.replace(sides[0], '{side}'))
+
+
+def pair_leaf_images(image_paths):
+    """
+    This function pairs the front and back images of the same leaf. Only file names and their parent
+    directories are matched: a front image is paired with the back image whose file name is same after
+    replacing 'front' with 'back', in the same directory or in sibling directories named front and back.
+    i.e. 12_front.jpg with 12_back.jpg, or output/alphonso/front/alphonso_front_12_front.jpg (as named by
+    expand_dataset.py) with output/alphonso/back/alphonso_back_12_back.jpg.
+
+    arguments:
+     image_paths - list of leaf image file paths.
+    returns:
+     list of (front_path, back_path) tuples. Images without a matching image are left out.
+    """
+    sides = dict()
+    for path in image_paths:
+        side, key = _pair_key(path)
+        if side is not None:
+            sides.setdefault(key, dict())[side] = path
+    pairs = list()
+    for path in image_paths:
+        side, key = _pair_key(path)
+        if side == 'front' and 'back' in sides[key]:
+            pairs.append((path, sides[key]['back']))
+    return pairs
+
+
+def extract_pair_features(pairs):
+    """
+    This function extracts features of the front and back images of leaves. Images of all leaves are
+    read concurrently and processed together in one batch by the worker pool.
+
+    arguments:
+     pairs - list of (front_path, back_path) tuples.
+    returns:
+     numpy array of shape N x 2 x M where N is no of pairs and M is no of features. Index 0 of second
+     dimension holds the front image features and index 1 holds the back image features.
+    """
+    image_paths = [path for pair in pairs for path in pair]
+    vectors = process_images(image_paths,
+                             lambda image_path, image, save: features_to_vector(extract_features(image_path, image)))
+    return np.array(vectors).reshape(len(pairs), 2, len(FEATURE_COLUMNS))
+
+
+def predict_leaves(model, pairs, mode=MODE_ENSEMBLE):
+    """
+    This function predicts the label of each leaf from its front and back images with a single model invocation
+    for all leaves.
+
+    arguments:
+     model - trained classifier. In MODE_CONCAT it must be trained on PAIR_FEATURE_COLUMNS and in MODE_ENSEMBLE it
+             must be trained on FEATURE_COLUMNS and support predict_proba.
+     pairs - list of (front_path, back_path) tuples.
+     mode (optional) - MODE_CONCAT or MODE_ENSEMBLE.
+    returns:
+     numpy array of predicted labels, one for each pair.
+    """
+    vectors = extract_pair_features(pairs)
+    if mode == MODE_CONCAT:
+        return model.predict(vectors.reshape(len(pairs), -1))
+    elif mode == MODE_ENSEMBLE:
+        if not hasattr(model, 'predict_proba'):
+            raise Exception("model must support predict_proba in ensemble mode")
+        # Classify front and back images in one batch and average their class probabilities
+        probabilities = model.predict_proba(vectors.reshape(2 * len(pairs), -1))
+        probabilities = probabilities.reshape(len(pairs), 2, -1).mean(axis=1)
+        return model.classes_[np.argmax(probabilities, axis=1)]
+    else:
+        raise Exception("arg `mode` must be either '" + MODE_CONCAT + "' or '" + MODE_ENSEMBLE + "'")
+
+
+def predict_leaf(model, front_path, back_path, mode=MODE_ENSEMBLE):
+    """
+    This function predicts the label of a leaf from its front and back images. See predict_leaves.
+
+    arguments:
+     model - trained classifier.
+     front_path - string containing path to front image file of the leaf.
+     back_path - string containing path to back image file of the leaf.
+     mode (optional) - MODE_CONCAT or MODE_ENSEMBLE.
+    returns:
+     predicted label of the leaf.
+    """
+    return predict_leaves(model, [(front_path, back_path)], mode)[0]
@@ -0,0 +1,27 @@
+# Script to predict mango variety of a leaf from its front and back images using a single model invocation
+import joblib
+from leaf_pairs import MODE_CONCAT, MODE_ENSEMBLE, PAIR_FEATURE_COLUMNS, predict_leaf
+
+# Serialized classifier model file. Either a model trained on labeled_pair_dataset.csv or a model
+# trained on labeled_dataset.csv.
+model_file_name = 'mango_leaf_classifier.rf'
+
+# Mapping of numeric labels to string value
+label_map_rev = {
+    0: 'alphonso',
+    1: 'amrapali',
+    2: 'chausa',
+    3: 'dusheri',
+    4: 'langra'
+}
+
+classifier = joblib.load(model_file_name)
+# Models trained on paired feature vectors classify both images in one vector, other models classify each image
+if getattr(classifier, 'n_features_in_', None) == len(PAIR_FEATURE_COLUMNS):
+    mode = MODE_CONCAT
+else:
+    mode = MODE_ENSEMBLE
+front_path = input("Enter leaf front image path : ")
+back_path = input("Enter leaf back image path : ")
+label = predict_leaf(classifier, front_path, back_path, mode)
+print("Predicted Variety : " + label_map_rev.get(label, str(label)))
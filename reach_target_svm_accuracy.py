@@ -2,7 +2,8 @@ import os
 import numpy as np
 import pandas
 from sklearn import svm
-from sklearn.model_selection import train_test_split
+from dedup import grouped_train_test_split
+from utils import load_labeled_dataset
 # Prepare dataset directory and load dataset csv file into Pandas DataFrame
 
 # Leaves Dataset Folder Name
@@ -11,8 +12,14 @@ dataset_folder = 'PreprocessedDatabase'
 dataset_filename = 'labeled_dataset.csv'
 # Current working directory
 cwd = os.getcwd()
-# Load the dataset from CSV file into pandas DataFrame
-data = pandas.read_csv(os.path.join(cwd, dataset_folder, dataset_filename))
+# Load float32 feature vectors and corresponding labels from CSV file
+X, Y = load_labeled_dataset(os.path.join(cwd, dataset_folder, dataset_filename))
+# Leaves Dataset Groups File Name
+groups_filename = 'labeled_dataset_groups.csv'
+# Load near duplicate group of each row if available so that near duplicates do not leak between splits
+groups = None
+if os.path.exists(os.path.join(cwd, dataset_folder, groups_filename)):
+    groups = pandas.read_csv(os.path.join(cwd, dataset_folder, groups_filename))['group'].to_numpy()
 
 # Create lists of feature vectors and corresponding labels from dataframe
 
@@ -32,10 +39,6 @@ label_map_rev = {
     3: 'dusheri',
     4: 'langra'
 }
-# List of feature vectors
-X = data.iloc[:, :len(data.columns)-1].to_numpy(copy=True)
-# List of corresponding label to each feature vector
-Y = data.iloc[:,-1].to_numpy(copy=True)
 # Map string labels to numeric values
 Y = np.array([label_map[label] for label in Y])
 
@@ -73,7 +76,7 @@ print("Target accuracy : %f\nNumber of Iterations : %d" % (target_accuracy * 100
 for i in range(iterations):
     print("Iteration : %d" % (i+1), end='\r')
     # Create and Split Training and Test Data
-    X_train, X_test, Y_train, Y_test = train_test_split(X, Y, train_size=0.8, test_size=0.2, shuffle=True)
+    X_train, X_test, Y_train, Y_test = grouped_train_test_split(X, Y, groups, train_size=0.8, test_size=0.2)
 
     # Train and Test Support Vector Classifier
 
@@ -2,6 +2,7 @@
 import os
 from PIL import Image
 from utils import get_file_paths
+from async_image_io import process_images, decode_pil, encode_pil
 
 # Scale by which to reduce each dimension of image
 REDUCE_SCALE = 3
@@ -9,17 +10,18 @@ REDUCE_SCALE = 3
 # Dataset Directory Name
 dataset_dir_name = 'MangoLeavesDatabase'
 
-# Retrieve all image paths in the dataset directory
-image_files = get_file_paths(os.path.join(os.getcwd(), dataset_dir_name), extension=['.jpg'], recursive=True)
-print("Resizing images ...")
-for img_file in image_files:
-    # Read Image
-    img = Image.open(img_file)
+
+def resize_image(img_file, img, save):
     # Get original width and height
     w, h = img.size
     # Resize the image by applying REDUCE_SCALE in both dimensions
     resized_img = img.resize((w // REDUCE_SCALE, h // REDUCE_SCALE), Image.ANTIALIAS)
     # Save resized image by overwriting original image.
-    resized_img.save(img_file, 'JPEG')
-print("Resizing Completed!")
+    save(img_file, encode_pil(resized_img, 'JPEG'))
 
+
+# Retrieve all image paths in the dataset directory
+image_files = get_file_paths(os.path.join(os.getcwd(), dataset_dir_name), extension=['.jpg'], recursive=True)
+print("Resizing images ...")
+process_images(image_files, resize_image, decode=decode_pil)
+print("Resizing Completed!")
@@ -5,109 +5,22 @@ import cv2
 import os
 import utils
 import math
-from collections import namedtuple
+import hashlib
+from async_image_io import process_images, decode_cv2
+from dedup import dhash, phash, hash_thumbnails, group_near_duplicates
+from leaf_features import FEATURE_COLUMNS, extract_features, features_to_vector
 
-def extract_features(image_path):
-    """
-    This function extracts the following features from an image at a given path and return those features as
-    a namedtuple object.
-    Features :-
-    1. Aspect Ratio
-    2. Leaf Area
-    3. Leaf Margin Perimeter
-    4. Form Factor
-    5. Mean Color
-    6. Vein Area Ratio
-    7. Elongation
-    
-    These features can be accessed in the returned namedtuple object by using following attributes on that object :-
-    1. aspectratio - Aspect Ratio of Leaf
-    2. area - Leaf Area to bounding rectangle area ratio
-    3. perimeter - Leaf Perimeter to bounding rectangle perimeter ratio
-    4. formfactor - Form Factor
-    5. meancolor - Mean Color
-    6. veinarea - Ratio of vein area to leaf area
-    7. elongation - Measuring the length of the object
-    
-    arguments:
-     image_path - string containing path to leaf image file.
-    returns:
-     namedtuple object containing extracted features of the leaf.
-    """
-    # Read image from image file
-    bgr_image = cv2.imread(image_path)
-    # Obtain RGB and Grayscale images
-    rgb_image = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB)
-    # Apply binary otsu thresholdng to grayscale image
-    gray_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2GRAY)
-    ostu_value, thresh_image = cv2.threshold(gray_image,0, 255,cv2.THRESH_BINARY+cv2.THRESH_OTSU)
-    # Find all contours in thresholded image using RETR_EXTERNAL method
-    image_contours, _ = cv2.findContours(thresh_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    # Find leaf contour among all contours
-    leaf_contour = max(image_contours, key=cv2.contourArea) # Contour having maximum area is our leaf contour
-    
-    # FEATURE - Aspect Ratio
-    x, y, w, h = cv2.boundingRect(leaf_contour)
-    aspectratio = h / w
-    
-    # FEATURE - Area
-    area = cv2.contourArea(leaf_contour)
-    area_ratio = area / (w * h)
-    
-    # FEATURE - Perimeter
-    perimeter = cv2.arcLength(leaf_contour, True)
-    perimeter_ratio = perimeter / (2 * (w + h))
-    
-    # FEATURE - Form Factor
-    formfactor = (4 * np.pi * area) / perimeter ** 2
-    
-    # FEATURE - Mean Color
-    # Crop rgb image using bounding rectangle of leaf contour to get leaf portion
-    leaf_portion = rgb_image[y:y+h, x:x+w]
-    r_mean = np.mean(leaf_portion[: ,: ,0]) / 255
-    g_mean = np.mean(leaf_portion[: ,: ,1]) / 255
-    b_mean = np.mean(leaf_portion[: ,: ,2]) / 255
-    meancolor = (r_mean, g_mean, b_mean)
-    
-    # FEATURE - Vein Area Ratio
-    # Apply sobel filter to image for vein detection
-    leaf_portion = cv2.cvtColor(leaf_portion, cv2.COLOR_RGB2GRAY)
-    sobel_img = cv2.Sobel(leaf_portion,cv2.CV_64F,1,1,ksize=3)
-    sobel_img = np.uint8(sobel_img)
-    # Apply Morphological erosion on sobel image
-    kernel2 = np.ones((2,1), np.uint8)
-    kernel4 = np.ones((4,1), np.uint8)
-    erosion2 = cv2.morphologyEx(sobel_img, cv2.MORPH_ERODE, kernel2)
-    erosion4 = cv2.morphologyEx(sobel_img, cv2.MORPH_ERODE, kernel4)
-    # Calculate ratio of no of non-black pixels to total no of leaf pixels
-    non_black_pixels = 0
-    for intensity in erosion2.flatten():
-        if intensity > 0:
-            non_black_pixels += 1
-    vein_area_ratio_1 = non_black_pixels / area
-    non_black_pixels = 0
-    for intensity in erosion4.flatten():
-        if intensity > 0:
-            non_black_pixels += 1
-    vein_area_ratio_2 = non_black_pixels / area
 
-    # FEATURE - Elongation
-    minor_axis = min(w,h)
-    major_axis = max(w,h)
-    elongation = 1 - (minor_axis / major_axis)
+def decode_with_digest(data):
+    # Digest of file bytes identifies exact duplicate images
+    return hashlib.sha1(data).hexdigest(), decode_cv2(data)
+
+
+def extract_image(image_path, decoded, save):
+    digest, image = decoded
+    # Only small thumbnails are kept, they are hashed together once all images of a variety are processed
+    return digest, hash_thumbnails(image), extract_features(image_path, image)
 
-    # Create and return namedtuple containing extracted features
-    Feature = namedtuple('Feature', ['aspectratio', 'area', 'perimeter', 'formfactor', 'meancolor', 'veinarea1', 'veinarea2', 'elongation'])
-    leaf_feature = Feature(
-        aspectratio=aspectratio,
-        area=area_ratio,
-        perimeter=perimeter_ratio,
-        formfactor=formfactor,
-        meancolor=meancolor,
-        veinarea1=vein_area_ratio_1,
-        veinarea2=vein_area_ratio_2,
-        elongation=elongation)
-    return leaf_feature
 
 print("Preparing dataset directories ...")
 # Prepare dataset directories and image files paths
@@ -129,38 +42,52 @@ for label, path in paths.items():
     image_dict[label] = utils.get_file_paths(path, ['.jpg'])
 # CSV file output path
 csv_file_output_path = os.path.join(working_dir, dataset, 'labeled_dataset.csv')
+# Groups CSV file output path. Its rows are the near duplicate groups of the rows in CSV file.
+groups_csv_file_output_path = os.path.join(working_dir, dataset, 'labeled_dataset_groups.csv')
 print("Start processing images ...")
 
 # Generate Pandas DataFrame containing extracted features for each image file. If M features are extracted from N images then DataFrame will be of N x M dimension.
-# Columns of the data
-cols = ['aspectratio', 'area', 'perimeter', 'formfactor', 'meanR', 'meanG', 'meanB', 'veinarea1', 'veinarea2', 'elongation', 'label']
-# Create an empty dataframe with above columns
-data = pd.DataFrame(columns=cols)
+# Feature vectors and labels of the data
+vectors = list()
+labels = list()
+# Digests of the images already added to data, used to skip exact duplicates
+digests = set()
+# Perceptual hashes of the images added to data, used to group near duplicates
+phashes = list()
+dhashes = list()
 # Extract image features of each image of each variety
 for label, path_list in image_dict.items():
-    i=0
     total = len(path_list)
     print("Variety : " , label, "\tTotal Images : " , total)
-    for image_path in path_list:
-        features = extract_features(image_path)
-        data = data.append({
-            cols[0]: features.aspectratio,
-            cols[1]: features.area,
-            cols[2]: features.perimeter,
-            cols[3]: features.formfactor,
-            cols[4]: features.meancolor[0],
-            cols[5]: features.meancolor[1],
-            cols[6]: features.meancolor[2],
-            cols[7]: features.veinarea1,
-            cols[8]: features.veinarea2,
-            cols[9]: features.elongation,
-            cols[10]: label,
-        }, ignore_index=True)
-        i += 1
-        print(label + " : ", str(i)+"/"+str(total), " images processed")
+    # Images are read concurrently and features are extracted in a worker pool
+    results = process_images(path_list, extract_image, decode=decode_with_digest)
+    variety_thumbnails = list()
+    for image_path, (digest, thumbnails, features) in zip(path_list, results):
+        if digest in digests:
+            print("Skipping duplicate image : " + image_path)
+            continue
+        digests.add(digest)
+        variety_thumbnails.append(thumbnails)
+        vectors.append(features_to_vector(features))
+        labels.append(label)
+    # Hash all images of the variety at once
+    if len(variety_thumbnails) != 0:
+        phashes.extend(phash([thumbnails[0] for thumbnails in variety_thumbnails]))
+        dhashes.extend(dhash([thumbnails[1] for thumbnails in variety_thumbnails]))
+    print(label + " : ", str(total)+"/"+str(total), " images processed")
+
+# Create dataframe with float32 feature columns followed by label column
+data = pd.DataFrame(np.array(vectors, dtype=np.float32).reshape(len(vectors), len(FEATURE_COLUMNS)), columns=FEATURE_COLUMNS)
+data['label'] = labels
 
 # Export Data to CSV File
+# Near duplicates i.e. augmented versions of the same leaf image share a group so that they can be kept
+# in the same split by dedup.grouped_train_test_split
+data['group'] = group_near_duplicates(phashes, dhashes, labels)
 # Shuffle the rows of data before saving
 data = data.sample(frac=1).reset_index(drop=True)
-data.to_csv(csv_file_output_path, index=False)
+groups = data.pop('group')
+# 9 significant digits are enough to read back the exact float32 values
+data.to_csv(csv_file_output_path, index=False, float_format=utils.FLOAT32_FORMAT)
+groups.to_csv(groups_csv_file_output_path, index=False, header=True)
 print("Completed! Features are extracted and CSV file is generated.")
\ No newline at end of file
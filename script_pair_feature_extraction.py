@@ -0,0 +1,47 @@
+# Script to extract features of paired front and back leaf images and generate a csv file
+import pandas as pd
+import os
+import utils
+from leaf_pairs import PAIR_FEATURE_COLUMNS, pair_leaf_images, extract_pair_features
+
+print("Preparing dataset directories ...")
+# Prepare dataset directories and image files paths
+# Leaves Dataset Folder Name
+dataset = 'PreprocessedDatabase'
+# Get Current Working directory
+working_dir = os.getcwd()
+# Generate paths for varieties
+paths = {
+    'alphonso': os.path.join(working_dir, dataset, 'alphonso/'),
+    'amrapali': os.path.join(working_dir, dataset, 'amrapali/'),
+    'chausa': os.path.join(working_dir, dataset, 'chausa/'),
+    'dusheri': os.path.join(working_dir, dataset, 'dusheri/'),
+    'langra': os.path.join(working_dir, dataset, 'langra/'),
+}
+# Generate a dictionary storing lists of front and back image path pairs of a particular variety accessible using corresponding variety name.
+pair_dict = dict()
+for label, path in paths.items():
+    pair_dict[label] = pair_leaf_images(utils.get_file_paths(path, ['.jpg']))
+# CSV file output path
+csv_file_output_path = os.path.join(working_dir, dataset, 'labeled_pair_dataset.csv')
+print("Start processing images ...")
+
+# Generate Pandas DataFrame containing front features followed by back features of each leaf.
+data_list = list()
+for label, pairs in pair_dict.items():
+    print("Variety : ", label, "\tTotal Leaves : ", len(pairs))
+    if len(pairs) == 0:
+        continue
+    # Front and back images of all leaves of the variety are processed in one batch
+    vectors = extract_pair_features(pairs)
+    variety_data = pd.DataFrame(vectors.reshape(len(pairs), -1), columns=PAIR_FEATURE_COLUMNS)
+    variety_data['label'] = label
+    data_list.append(variety_data)
+data = pd.concat(data_list, ignore_index=True)
+
+# Export Data to CSV File
+# Shuffle the rows of data before saving
+data = data.sample(frac=1).reset_index(drop=True)
+# 9 significant digits are enough to read back the exact float32 values
+data.to_csv(csv_file_output_path, index=False, float_format=utils.FLOAT32_FORMAT)
+print("Completed! Features are extracted and CSV file is generated.")
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from async_image_io import (process_images, process_images_async, read_file_bytes, write_file_bytes, decode_pil,
+                            encode_cv2)
+
+# Latency in seconds added to every read and write by the slow filesystem stand-in
+LATENCY = 0.02
+# Seconds after which a call to process_images is considered hung
+HANG_TIMEOUT = 20
+
+
+class SlowFileSystem:
+    """
+    Local filesystem stand-in which adds latency to every read and write and records the
+    maximum number of concurrent operations, like network storage with high per file latency.
+    """
+
+    def __init__(self, latency=LATENCY):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.written = list()
+
+    def _enter(self):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def _exit(self):
+        with self.lock:
+            self.active -= 1
+
+    def read_file(self, file_path):
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            return read_file_bytes(file_path)
+        finally:
+            self._exit()
+
+    def write_file(self, file_path, data):
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            write_file_bytes(file_path, data)
+            with self.lock:
+                self.written.append(file_path)
+        finally:
+            self._exit()
+
+
+def create_images(directory, count=40):
+    image_paths = list()
+    for i in range(count):
+        image_path = os.path.join(str(directory), 'img%d.png' % i)
+        # Each image is filled with its own index so results can be matched to paths
+        write_file_bytes(image_path, encode_cv2(np.full((8, 12, 3), i, np.uint8), '.png'))
+        image_paths.append(image_path)
+    return image_paths
+
+
+def run_with_timeout(target):
+    """
+    Runs target in a thread and fails the test instead of hanging when it does not finish.
+    """
+    outcome = dict()
+
+    def run():
+        try:
+            outcome['result'] = target()
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(HANG_TIMEOUT)
+    assert not thread.is_alive(), "process_images did not finish in %d seconds" % HANG_TIMEOUT
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def test_results_follow_order_of_paths(tmp_path):
+    image_paths = create_images(tmp_path)
+    fs = SlowFileSystem()
+    results = process_images(image_paths, lambda image_path, image, save: (image_path, int(image[0, 0, 0])),
+                             read_file=fs.read_file, write_file=fs.write_file)
+    assert results == [(image_path, i) for i, image_path in enumerate(image_paths)]
+
+
+def test_concurrent_reads_hide_latency(tmp_path):
+    image_paths = create_images(tmp_path)
+    fs = SlowFileSystem()
+    ts = time.time()
+    process_images(image_paths, lambda image_path, image, save: None, io_concurrency=16,
+                   read_file=fs.read_file, write_file=fs.write_file)
+    elapsed = time.time() - ts
+    serial_time = len(image_paths) * LATENCY
+    assert fs.max_active > 1
+    assert elapsed < serial_time / 2
+
+
+def test_every_output_is_written(tmp_path):
+    image_paths = create_images(tmp_path)
+    output_dir = os.path.join(str(tmp_path), 'output')
+    fs = SlowFileSystem()
+
+    def save_copies(image_path, image, save):
+        name = os.path.basename(image_path)
+        save(os.path.join(output_dir, 'a', name), encode_cv2(image, '.png'))
+        save(os.path.join(output_dir, 'b', name), encode_cv2(image, '.png'))
+
+    process_images(image_paths, save_copies, io_concurrency=4, write_queue_size=2,
+                   read_file=fs.read_file, write_file=fs.write_file)
+    assert len(fs.written) == 2 * len(image_paths)
+    for image_path in image_paths:
+        name = os.path.basename(image_path)
+        for sub_dir in ['a', 'b']:
+            output_path = os.path.join(output_dir, sub_dir, name)
+            assert read_file_bytes(output_path) == read_file_bytes(image_path)
+
+
+def test_pil_decoder(tmp_path):
+    image_paths = create_images(tmp_path, count=3)
+    results = process_images(image_paths, lambda image_path, img, save: img.size, decode=decode_pil)
+    assert results == [(12, 8)] * 3
+
+
+def test_processing_error_propagates(tmp_path):
+    image_paths = create_images(tmp_path)
+    fs = SlowFileSystem()
+
+    def fail_on_fifth(image_path, image, save):
+        if int(image[0, 0, 0]) == 5:
+            raise ValueError("bad image")
+
+    with pytest.raises(ValueError, match="bad image"):
+        process_images(image_paths, fail_on_fifth, read_file=fs.read_file, write_file=fs.write_file)
+
+
+def test_write_error_propagates(tmp_path):
+    image_paths = create_images(tmp_path, count=5)
+
+    def failing_write(file_path, data):
+        raise IOError("disk full")
+
+    with pytest.raises(IOError, match="disk full"):
+        process_images(image_paths, lambda image_path, image, save: save(image_path + '.out', b'x'),
+                       write_file=failing_write)
+
+
+def test_processing_error_with_full_write_queue_does_not_hang(tmp_path):
+    image_paths = create_images(tmp_path)
+    output_dir = os.path.join(str(tmp_path), 'output')
+    fs = SlowFileSystem()
+
+    def save_then_fail(image_path, image, save):
+        save(os.path.join(output_dir, os.path.basename(image_path)), encode_cv2(image, '.png'))
+        if int(image[0, 0, 0]) == 10:
+            raise ValueError("bad image")
+
+    with pytest.raises(ValueError, match="bad image"):
+        run_with_timeout(lambda: process_images(image_paths, save_then_fail, io_concurrency=2, write_queue_size=1,
+                                                read_file=fs.read_file, write_file=fs.write_file))
+
+
+def test_process_images_from_running_event_loop(tmp_path):
+    image_paths = create_images(tmp_path, count=5)
+
+    async def notebook_cell():
+        # Like a Jupyter cell or an async request handler, which run inside an event loop
+        return process_images(image_paths, lambda image_path, image, save: int(image[0, 0, 0]))
+
+    assert run_with_timeout(lambda: asyncio.run(notebook_cell())) == list(range(5))
+
+
+def test_process_images_async_shares_running_loop(tmp_path):
+    image_paths = create_images(tmp_path, count=5)
+    fs = SlowFileSystem()
+
+    async def handler():
+        return await process_images_async(image_paths, lambda image_path, image, save: int(image[0, 0, 0]),
+                                          read_file=fs.read_file, write_file=fs.write_file)
+
+    assert run_with_timeout(lambda: asyncio.run(handler())) == list(range(5))
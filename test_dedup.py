@@ -0,0 +1,135 @@
+import warnings
+import numpy as np
+import cv2
+import pytest
+from PIL import Image, ImageEnhance
+from dedup import (BKTree, DHASH_DISTANCE, MAX_GROUP_SIZE, PHASH_DISTANCE, dhash, group_near_duplicates,
+                   grouped_train_test_split, hamming_distance, hash_thumbnails, phash)
+
+# Enhancement factors of expand_dataset.py
+CONTRAST = 1.5
+BRIGHTNESS = 1.5
+SHARPNESS = 1.5
+COLOR = 1.5
+
+
+def leaf_image(rng):
+    """
+    Draws a synthetic preprocessed leaf: a green ellipse with a midrib, of random size, position and
+    orientation, on a white background with sensor noise.
+    """
+    image = np.full((300, 220, 3), 245, np.uint8)
+    center = (110 + int(rng.randint(-15, 15)), 150 + int(rng.randint(-15, 15)))
+    axes = (int(rng.randint(50, 80)), int(rng.randint(100, 130)))
+    color = (int(rng.randint(20, 60)), int(rng.randint(100, 180)), int(rng.randint(20, 70)))
+    cv2.ellipse(image, center, axes, int(rng.randint(-20, 20)), 0, 360, color, -1)
+    cv2.line(image, (center[0], center[1] - axes[1]), (center[0], center[1] + axes[1]),
+             tuple(c + 40 for c in color), 2)
+    return np.clip(image + rng.normal(0, 6, image.shape), 0, 255).astype(np.uint8)
+
+
+def enhance(image):
+    img = Image.fromarray(image[:, :, ::-1])
+    img = ImageEnhance.Contrast(img).enhance(CONTRAST)
+    img = ImageEnhance.Brightness(img).enhance(BRIGHTNESS)
+    img = ImageEnhance.Sharpness(img).enhance(SHARPNESS)
+    img = ImageEnhance.Color(img).enhance(COLOR)
+    return np.asarray(img)[:, :, ::-1].copy()
+
+
+@pytest.fixture(scope='module')
+def leaves():
+    rng = np.random.RandomState(0)
+    return [leaf_image(rng) for _ in range(100)]
+
+
+def test_bktree_search_matches_brute_force():
+    rng = np.random.RandomState(0)
+    # Hashes close to a few centers so that searches find many matches
+    centers = rng.randint(0, 2 ** 63, size=5, dtype=np.uint64)
+    hashes = [int(centers[rng.randint(5)]) ^ int(sum(1 << int(b) for b in rng.choice(64, rng.randint(8), False)))
+              for _ in range(500)]
+    tree = BKTree()
+    for i, hash_value in enumerate(hashes):
+        tree.add(hash_value, i)
+    assert len(tree) == len(hashes)
+    for query in hashes[:50] + [int(h) for h in rng.randint(0, 2 ** 63, size=10, dtype=np.uint64)]:
+        for max_distance in [0, 3, 10]:
+            matches = tree.search(query, max_distance)
+            expected = sorted((hamming_distance(query, h), i) for i, h in enumerate(hashes)
+                              if hamming_distance(query, h) <= max_distance)
+            assert sorted(matches) == expected
+            assert [d for d, _ in matches] == sorted(d for d, _ in matches)
+
+
+def test_hashes_are_stable_under_enhancement(leaves):
+    enhanced = [enhance(image) for image in leaves]
+    phash_distances = [hamming_distance(a, b) for a, b in zip(phash(leaves), phash(enhanced))]
+    dhash_distances = [hamming_distance(a, b) for a, b in zip(dhash(leaves), dhash(enhanced))]
+    matched = [p <= PHASH_DISTANCE and d <= DHASH_DISTANCE for p, d in zip(phash_distances, dhash_distances)]
+    assert np.mean(matched) >= 0.9
+
+
+def test_distinct_leaves_are_not_near_duplicates(leaves):
+    phashes, dhashes = phash(leaves), dhash(leaves)
+    matched = [hamming_distance(phashes[i], phashes[j]) <= PHASH_DISTANCE and
+               hamming_distance(dhashes[i], dhashes[j]) <= DHASH_DISTANCE
+               for i in range(len(leaves)) for j in range(i + 1, len(leaves))]
+    assert np.mean(matched) <= 0.01
+
+
+def test_thumbnails_give_same_hashes(leaves):
+    thumbnails = [hash_thumbnails(image) for image in leaves]
+    np.testing.assert_array_equal(phash([t[0] for t in thumbnails]), phash(leaves))
+    np.testing.assert_array_equal(dhash([t[1] for t in thumbnails]), dhash(leaves))
+
+
+def test_groups_keep_enhanced_copies_together(leaves):
+    images = leaves + [enhance(image) for image in leaves]
+    groups = group_near_duplicates(phash(images), dhash(images), ['alphonso'] * len(images))
+    n = len(leaves)
+    assert np.mean(groups[:n] == groups[n:]) >= 0.9
+    assert len(np.unique(groups)) >= 0.8 * n
+
+
+def test_groups_never_mix_labels(leaves):
+    # Same images under two labels must never share a group
+    images = leaves[:20] * 2
+    labels = ['alphonso'] * 20 + ['langra'] * 20
+    groups = group_near_duplicates(phash(images), dhash(images), labels)
+    assert set(groups[:20]).isdisjoint(groups[20:])
+    np.testing.assert_array_equal(np.unique(groups[:20], return_inverse=True)[1],
+                                  np.unique(groups[20:], return_inverse=True)[1])
+
+
+def test_group_size_is_capped():
+    # Identical hashes would all join one exemplar without the cap
+    count = 3 * MAX_GROUP_SIZE + 1
+    groups = group_near_duplicates([7] * count, [9] * count, ['alphonso'] * count)
+    sizes = np.bincount(groups)
+    assert sizes.max() == MAX_GROUP_SIZE
+    assert sizes.sum() == count and len(sizes) == 4
+
+
+def test_grouped_split_keeps_groups_in_one_split():
+    rng = np.random.RandomState(0)
+    groups = rng.randint(50, size=400)
+    X = np.arange(400).reshape(-1, 1)
+    Y = rng.randint(5, size=400)
+    X_train, X_test, Y_train, Y_test = grouped_train_test_split(X, Y, groups, train_size=0.8, test_size=0.2,
+                                                                random_state=0)
+    assert set(groups[X_train.ravel()]).isdisjoint(groups[X_test.ravel()])
+    assert len(X_train) + len(X_test) == len(X)
+    np.testing.assert_array_equal(Y_train, Y[X_train.ravel()])
+    np.testing.assert_array_equal(Y_test, Y[X_test.ravel()])
+
+
+def test_grouped_split_without_groups_warns():
+    X = np.arange(20).reshape(-1, 1)
+    Y = np.arange(20) % 2
+    with pytest.warns(UserWarning, match="Less than 2 groups"):
+        X_train, X_test, _, _ = grouped_train_test_split(X, Y, np.zeros(20), train_size=0.5, test_size=0.5)
+    assert len(X_train) == len(X_test) == 10
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        grouped_train_test_split(X, Y, None, train_size=0.5, test_size=0.5)
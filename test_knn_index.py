@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from sklearn.neighbors import NearestNeighbors
+from knn_index import IVFKNeighborsClassifier
+
+N_LISTS = 16
+
+
+@pytest.fixture
+def data():
+    rng = np.random.RandomState(0)
+    centers = rng.normal(size=(6, 4)) * 4
+    labels = rng.randint(6, size=2000)
+    # Features on different scales, so that neighbors depend on standardization
+    X = (centers[labels] + rng.normal(size=(2000, 4))) * np.array([1, 10, 100, 0.1])
+    queries = (centers[rng.randint(6, size=50)] + rng.normal(size=(50, 4))) * np.array([1, 10, 100, 0.1])
+    return X.astype(np.float32), labels, queries.astype(np.float32)
+
+
+def brute_force_kneighbors(classifier, X, queries, n_neighbors):
+    standardize = lambda V: (V - classifier.mean_) / classifier.scale_
+    return NearestNeighbors(n_neighbors=n_neighbors).fit(standardize(X)).kneighbors(standardize(queries))
+
+
+def test_probing_all_lists_gives_exact_neighbors(data):
+    X, Y, queries = data
+    classifier = IVFKNeighborsClassifier(n_neighbors=5, n_lists=N_LISTS, n_probe=N_LISTS).fit(X, Y)
+    distances, indices = classifier.kneighbors(queries)
+    exact_distances, exact_indices = brute_force_kneighbors(classifier, X, queries, 5)
+    np.testing.assert_allclose(distances, exact_distances, rtol=1e-4, atol=1e-4)
+    # Indices refer to rows of X passed to fit
+    np.testing.assert_array_equal(indices, exact_indices)
+
+
+def test_single_query_matches_batch(data):
+    X, Y, queries = data
+    for n_probe in [1, 3, N_LISTS]:
+        classifier = IVFKNeighborsClassifier(n_neighbors=5, n_lists=N_LISTS, n_probe=n_probe).fit(X, Y)
+        batch_distances, batch_indices = classifier.kneighbors(queries)
+        for i, query in enumerate(queries):
+            distances, indices = classifier.kneighbors(query.reshape(1, -1))
+            np.testing.assert_allclose(distances[0], batch_distances[i], rtol=1e-5, atol=1e-5)
+            np.testing.assert_array_equal(indices[0], batch_indices[i])
+
+
+def test_missing_neighbors_are_padded(data):
+    X, Y, queries = data
+    classifier = IVFKNeighborsClassifier(n_neighbors=5, n_lists=2, n_probe=2).fit(X[:3], Y[:3])
+    for batch in [queries, queries[:1]]:
+        distances, indices = classifier.kneighbors(batch)
+        assert distances.shape == indices.shape == (len(batch), 5)
+        assert np.all(np.isfinite(distances[:, :3])) and np.all(np.isinf(distances[:, 3:]))
+        assert np.all(np.sort(indices[:, :3], axis=1) == [0, 1, 2]) and np.all(indices[:, 3:] == -1)
+
+
+def test_predict_proba_rows_sum_to_one(data):
+    X, Y, queries = data
+    classifier = IVFKNeighborsClassifier(n_neighbors=5, n_lists=N_LISTS, n_probe=2).fit(X, Y)
+    probabilities = classifier.predict_proba(queries)
+    assert probabilities.shape == (len(queries), len(classifier.classes_))
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1)
+    # Also when less training vectors than neighbors are found
+    classifier = IVFKNeighborsClassifier(n_neighbors=5, n_lists=1, n_probe=1).fit(X[:3], Y[:3])
+    np.testing.assert_allclose(classifier.predict_proba(queries).sum(axis=1), 1)
+
+
+def test_predict_matches_neighbor_labels(data):
+    X, Y, queries = data
+    classifier = IVFKNeighborsClassifier(n_neighbors=1, n_lists=N_LISTS, n_probe=N_LISTS).fit(X, Y)
+    _, indices = classifier.kneighbors(queries)
+    np.testing.assert_array_equal(classifier.predict(queries), Y[indices[:, 0]])
@@ -0,0 +1,49 @@
+import os
+from leaf_pairs import _pair_key, pair_leaf_images
+
+
+def path(*parts):
+    return os.path.join(*parts)
+
+
+def test_pair_key_matches_file_name_only():
+    assert _pair_key(path('data', '12_front.jpg')) == ('front', ('data', '12_{side}.jpg'))
+    assert _pair_key(path('data', '12_back.jpg')) == ('back', ('data', '12_{side}.jpg'))
+    # Side tokens in directory names are ignored
+    assert _pair_key(path('frontier', 'backup', '12_back.jpg')) == ('back',
+                                                                  (path('frontier', 'backup'), '12_{side}.jpg'))
+    # File names naming no side or both sides can not be paired
+    assert _pair_key(path('data', '12.jpg')) == (None, None)
+    assert _pair_key(path('data', 'front_and_back.jpg')) == (None, None)
+
+
+def test_pairs_in_same_directory():
+    paths = [path('data', '1_front.jpg'), path('data', '1_back.jpg'), path('data', '2_front.jpg'),
+             path('data', '3_back.jpg'), path('data', '4.jpg')]
+    assert pair_leaf_images(paths) == [(path('data', '1_front.jpg'), path('data', '1_back.jpg'))]
+
+
+def test_pairs_in_sibling_front_and_back_directories():
+    paths = [path('leaves', 'back', '1_back.jpg'), path('leaves', 'front', '1_front.jpg'),
+             path('other', 'back', '2_back.jpg'), path('leaves', 'front', '2_front.jpg')]
+    assert pair_leaf_images(paths) == [(path('leaves', 'front', '1_front.jpg'), path('leaves', 'back', '1_back.jpg'))]
+
+
+def test_side_tokens_in_directory_names_are_not_substituted():
+    paths = [path('frontier', 'a', '1_front.jpg'), path('frontier', 'a', '1_back.jpg'),
+             path('backup', 'b', '2_front.jpg'), path('backup', 'b', '2_back.jpg'),
+             # Would pair with frontier/a/1_front.jpg if the whole path was substituted
+             path('backier', 'a', '1_back.jpg')]
+    assert pair_leaf_images(paths) == [(path('frontier', 'a', '1_front.jpg'), path('frontier', 'a', '1_back.jpg')),
+                                       (path('backup', 'b', '2_front.jpg'), path('backup', 'b', '2_back.jpg'))]
+
+
+def test_pairs_expand_dataset_outputs():
+    # Output names of expand_dataset.py: variety, side and path of source within variety directory
+    output = path('MangoLeavesDatabase', 'output', 'alphonso')
+    paths = [path(output, 'front', 'alphonso_front_t1_0_front.jpg'),
+             path(output, 'back', 'alphonso_back_t1_0_back.jpg'),
+             path(output, 'front', 'alphonso_front_t2_0_front.jpg'),
+             path(output, 'back', 'alphonso_back_t2_0_back.jpg'),
+             path(output, 'front', 'alphonso_front_t3_0_front.jpg')]
+    assert pair_leaf_images(paths) == [(paths[0], paths[1]), (paths[2], paths[3])]
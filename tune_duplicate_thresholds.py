@@ -0,0 +1,62 @@
+# Script to check near duplicate thresholds of dedup.py on the dataset.
+# It compares hash distances between each image and its enhanced version (which must be grouped together)
+# with distances between distinct images of the same variety (which must not be grouped together).
+import os
+import numpy as np
+from PIL import ImageEnhance
+from utils import get_file_paths
+from async_image_io import process_images, decode_pil
+from dedup import BKTree, PHASH_DISTANCE, DHASH_DISTANCE, dhash, phash, hamming_distance
+
+# Enhancement factors, same as expand_dataset.py
+CONTRAST = 1.5
+BRIGHTNESS = 1.5
+SHARPNESS = 1.5
+COLOR = 1.5
+
+dataset_path = 'MangoLeavesDatabase'
+varieties = ['alphonso', 'amrapali', 'chausa', 'dusheri', 'langra']
+
+
+def hash_image_and_enhanced(image_path, img, save):
+    enhanced = ImageEnhance.Contrast(img).enhance(CONTRAST)
+    enhanced = ImageEnhance.Brightness(enhanced).enhance(BRIGHTNESS)
+    enhanced = ImageEnhance.Sharpness(enhanced).enhance(SHARPNESS)
+    enhanced = ImageEnhance.Color(enhanced).enhance(COLOR)
+    images = [np.asarray(img.convert('L')), np.asarray(enhanced.convert('L'))]
+    return phash(images), dhash(images)
+
+
+def percentiles(values):
+    return "min %d\t5%% %d\t50%% %d\t95%% %d\tmax %d" % tuple(np.percentile(values, [0, 5, 50, 95, 100]))
+
+
+print("Thresholds : pHash %d bits, dHash %d bits" % (PHASH_DISTANCE, DHASH_DISTANCE))
+for variety in varieties:
+    if not os.path.isdir(os.path.join(dataset_path, variety)):
+        continue
+    image_paths = get_file_paths(os.path.join(dataset_path, variety), extension=['.jpg'], recursive=True)
+    if len(image_paths) < 2:
+        continue
+    hashes = process_images(image_paths, hash_image_and_enhanced, decode=decode_pil)
+    phashes = [p[0] for p, _ in hashes]
+    dhashes = [d[0] for _, d in hashes]
+    # Distances between each image and its enhanced version
+    augmented_phash = [hamming_distance(p[0], p[1]) for p, _ in hashes]
+    augmented_dhash = [hamming_distance(d[0], d[1]) for _, d in hashes]
+    augmented_matched = np.mean([p <= PHASH_DISTANCE and d <= DHASH_DISTANCE
+                                 for p, d in zip(augmented_phash, augmented_dhash)])
+    # Distances between each image and its nearest distinct image
+    tree = BKTree()
+    for i, hash_value in enumerate(phashes):
+        tree.add(hash_value, i)
+    nearest_phash = [tree.search(phashes[i], 64)[1][0] for i in range(len(phashes))]
+    distinct_matched = np.mean([any(hamming_distance(dhashes[i], dhashes[j]) <= DHASH_DISTANCE
+                                    for _, j in tree.search(phashes[i], PHASH_DISTANCE) if j != i)
+                                for i in range(len(phashes))])
+    print("Variety : %s\tImages : %d" % (variety, len(image_paths)))
+    print("  pHash distance to enhanced image\t" + percentiles(augmented_phash))
+    print("  dHash distance to enhanced image\t" + percentiles(augmented_dhash))
+    print("  pHash distance to nearest distinct image\t" + percentiles(nearest_phash))
+    print("  Enhanced images matched : %.1f%%\tImages matching a distinct image : %.1f%%" % (
+        100 * augmented_matched, 100 * distinct_matched))
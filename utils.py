@@ -1,6 +1,20 @@
 import os
+import json
+import struct
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas
 from PIL import Image
 
+# Name of the manifest file which caches per image metadata within a dataset directory
+MANIFEST_FILE_NAME = 'manifest.json'
+# Number of files whose headers are read concurrently while scanning a dataset
+SCAN_CONCURRENCY = 32
+# Format of float32 values in dataset CSV files, 9 significant digits read back the exact float32 value
+FLOAT32_FORMAT = '%.9g'
+# JPEG start of frame markers which carry image dimensions (DHT, JPG and DAC markers are excluded)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
 
 def get_file_paths(dir_name, extension=None, recursive=True):
     """
@@ -45,3 +59,120 @@ def rotate_image(image_path, deg, save_location):
     img = Image.open(image_path)
     img_rotated = img.rotate(deg, expand=True)  # expand=True will change image size to fit the rotated image
     img_rotated.save(save_location)
+
+
+def read_jpeg_size(image_path):
+    """
+    Reads the dimensions of a JPEG image from its header without decoding any pixel data.
+    Falls back to Pillow for files that are not baseline or progressive JPEG.
+    :param image_path: Path of the JPEG image
+    :return: Tuple (width, height) of the image
+    """
+    with open(image_path, 'rb') as f:
+        if f.read(2) == b'\xff\xd8':
+            while True:
+                # Skip to the next marker, markers may be padded with any number of 0xFF bytes
+                byte = f.read(1)
+                while byte and byte != b'\xff':
+                    byte = f.read(1)
+                while byte == b'\xff':
+                    byte = f.read(1)
+                if not byte:
+                    break
+                marker = byte[0]
+                if marker in JPEG_SOF_MARKERS:
+                    # Skip segment length and sample precision
+                    f.read(3)
+                    h, w = struct.unpack('>HH', f.read(4))
+                    return w, h
+                if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                    # Standalone markers have no segment
+                    continue
+                if marker == 0xD9 or marker == 0xDA:
+                    # End of image or start of scan reached without a frame header
+                    break
+                length, = struct.unpack('>H', f.read(2))
+                f.seek(length - 2, os.SEEK_CUR)
+    # Pillow only parses the header on open, pixels are decoded lazily
+    with Image.open(image_path) as img:
+        return img.size
+
+
+def load_manifest(dataset_dir):
+    """
+    Loads the manifest of a dataset directory which caches metadata of its image files.
+    Entries are keyed by file path relative to the dataset directory.
+    :param dataset_dir: Path of the dataset directory
+    :return: Dictionary mapping relative file paths to their metadata, empty if no manifest exists
+    """
+    manifest_path = os.path.join(dataset_dir, MANIFEST_FILE_NAME)
+    if not os.path.exists(manifest_path):
+        return dict()
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+def save_manifest(dataset_dir, manifest):
+    """
+    Saves the manifest of a dataset directory.
+    :param dataset_dir: Path of the dataset directory
+    :param manifest: Dictionary mapping relative file paths to their metadata
+    :return: None
+    """
+    manifest_path = os.path.join(dataset_dir, MANIFEST_FILE_NAME)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def get_manifest_entry(dataset_dir, manifest, file_path):
+    """
+    Gets the manifest entry of a file. The entry is reset when the file has been modified since it was cached.
+    :param dataset_dir: Path of the dataset directory
+    :param manifest: Dictionary mapping relative file paths to their metadata
+    :param file_path: Path of the file within dataset directory
+    :return: Dictionary holding the cached metadata of the file
+    """
+    stat = os.stat(file_path)
+    key = os.path.relpath(file_path, dataset_dir).replace(os.sep, '/')
+    entry = manifest.get(key)
+    if entry is None or entry.get('bytes') != stat.st_size or entry.get('mtime') != stat.st_mtime_ns:
+        entry = {'bytes': stat.st_size, 'mtime': stat.st_mtime_ns}
+        manifest[key] = entry
+    return entry
+
+
+def scan_image_sizes(dataset_dir, image_paths):
+    """
+    Gets the dimensions of images using only their headers. Headers are read concurrently and
+    the dimensions are cached in the dataset manifest so that unchanged files are not read again.
+    :param dataset_dir: Path of the dataset directory holding the manifest
+    :param image_paths: List of image file paths within the dataset directory
+    :return: List of (width, height) tuples in the same order as image_paths
+    """
+    manifest = load_manifest(dataset_dir)
+
+    def image_size(image_path):
+        entry = get_manifest_entry(dataset_dir, manifest, image_path)
+        if 'width' not in entry:
+            entry['width'], entry['height'] = read_jpeg_size(image_path)
+        return entry['width'], entry['height']
+
+    with ThreadPoolExecutor(max_workers=SCAN_CONCURRENCY) as executor:
+        sizes = list(executor.map(image_size, image_paths))
+    save_manifest(dataset_dir, manifest)
+    return sizes
+
+
+def load_labeled_dataset(csv_path, dtype=np.float32):
+    """
+    Loads a labeled dataset CSV file whose last column holds labels and other columns hold features.
+    Feature columns are parsed directly as dtype so no float64 copy of the data is created.
+    :param csv_path: Path of the dataset CSV file
+    :param dtype: Data type of feature values
+    :return: Tuple (X, Y) of C contiguous feature matrix and array of labels
+    """
+    columns = pandas.read_csv(csv_path, nrows=0).columns
+    data = pandas.read_csv(csv_path, dtype={col: dtype for col in columns[:-1]})
+    X = np.ascontiguousarray(data.iloc[:, :-1].to_numpy(dtype=dtype))
+    Y = data.iloc[:, -1].to_numpy()
+    return X, Y